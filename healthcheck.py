@@ -3,10 +3,15 @@
 Docker healthcheck script for Seplos BMS MQTT
 
 Checks:
-1. Health status file exists and is recent (< 120 seconds old)
+1. Health status file exists and is recent (mtime < 120 seconds old)
 2. Status is 'healthy'
 3. MQTT connection is active
 
+Health file format (written atomically by HealthMonitor):
+    healthy|unhealthy
+    mqtt:True|False
+    influxdb:True|False   (only when InfluxDB is enabled)
+
 Exit codes:
 0 = healthy
 1 = unhealthy
@@ -23,40 +28,39 @@ MAX_AGE_SECONDS = 120  # Health file should be updated within this time
 def check_health():
     """Check if the service is healthy"""
 
-    # Check if health file exists
-    if not os.path.exists(HEALTH_FILE):
+    # Check if health file exists and is recent (mtime is set on every write)
+    try:
+        st = os.stat(HEALTH_FILE)
+    except FileNotFoundError:
         print("Health file not found - service may still be starting")
         return 1
 
+    age = time.time() - st.st_mtime
+    if age > MAX_AGE_SECONDS:
+        print(f"Health file is stale ({int(age)}s old, max {MAX_AGE_SECONDS}s)")
+        return 1
+
     try:
-        with open(HEALTH_FILE, 'r') as f:
-            lines = f.readlines()
+        with open(HEALTH_FILE, 'rb') as f:
+            data = f.read(64)
 
+        # Line 0 is the status, line 1 the MQTT state
+        lines = data.split(b'\n', 2)
         if len(lines) < 2:
             print("Invalid health file format")
             return 1
 
-        # Check timestamp (first line)
-        timestamp = int(lines[0].strip())
-        age = time.time() - timestamp
-
-        if age > MAX_AGE_SECONDS:
-            print(f"Health file is stale ({int(age)}s old, max {MAX_AGE_SECONDS}s)")
+        # Check status (first line)
+        status = lines[0].strip()
+        if status != b'healthy':
+            print(f"Service status: {status.decode(errors='replace')}")
             return 1
 
-        # Check status (second line)
-        status = lines[1].strip()
-        if status != 'healthy':
-            print(f"Service status: {status}")
+        # Check MQTT (second line)
+        if lines[1].strip() == b'mqtt:False':
+            print("MQTT disconnected")
             return 1
 
-        # Check MQTT (third line)
-        if len(lines) >= 3:
-            mqtt_line = lines[2].strip()
-            if mqtt_line == 'mqtt:False':
-                print("MQTT disconnected")
-                return 1
-
         print(f"Healthy (last check {int(age)}s ago)")
         return 0
 
@@ -3,10 +3,37 @@ Configuration loader with section support and backwards compatibility
 """
 
 import os
+import re
 import sys
 import configparser
 from .logging_setup import get_logger
 
+# INI read path: '[section]' headers and 'key = value' lines
+_SECTION_RE = re.compile(r'^\[([^\]]+)\]\s*$')
+_KV_RE = re.compile(r'^\s*([^#;=:\s][^=:]*?)\s*=\s*(.*?)\s*$')
+
+# Sections used by the section-based config format
+_SECTIONS = ('general', 'serial', 'mqtt', 'influxdb', 'health')
+
+# Map new (section, key) names to old flat [seplos3mqtt] names for backwards compatibility
+_LEGACY_MAP = {
+    ('serial', 'port'): 'serial',
+    ('mqtt', 'server'): 'mqtt_server',
+    ('mqtt', 'port'): 'mqtt_port',
+    ('mqtt', 'username'): 'mqtt_user',
+    ('mqtt', 'password'): 'mqtt_pass',
+    ('mqtt', 'prefix'): 'mqtt_prefix',
+    ('influxdb', 'enabled'): 'influxdb_enabled',
+    ('influxdb', 'url'): 'influxdb_url',
+    ('influxdb', 'token'): 'influxdb_token',
+    ('influxdb', 'org'): 'influxdb_org',
+    ('influxdb', 'bucket'): 'influxdb_bucket',
+    ('influxdb', 'write_interval'): 'influxdb_write_interval',
+    ('influxdb', 'publish_mode'): 'influxdb_publish_mode',
+    ('health', 'check_interval'): 'health_check_interval',
+    ('general', 'log_level'): 'log_level',
+}
+
 
 def print_help():
     """Print usage help"""
@@ -67,6 +94,8 @@ class ConfigLoader:
     """Configuration loader with section support and backwards compatibility"""
     _instance = None
     _config = None
+    _config_path = None
+    _loaded = False
 
     @classmethod
     def get_instance(cls):
@@ -75,35 +104,103 @@ class ConfigLoader:
         return cls._instance
 
     def __init__(self, config_path='/app/seplos_bms_mqtt.ini'):
-        self.config = configparser.ConfigParser()
+        self._sections = {}
         self.config_loaded = False
         self.config_path = config_path
         self._load_config()
 
     def _load_config(self):
-        """Load configuration file"""
+        """Load configuration file (parsed at most once per process)"""
+        cls = type(self)
+        if cls._loaded:
+            self._sections = cls._config
+            self.config_loaded = bool(cls._config)
+            if cls._config_path:
+                self.config_path = cls._config_path
+            return
+
         log = get_logger()
         try:
-            # Try multiple paths
-            paths_to_try = [
-                self.config_path,
-                '/app/seplos_bms_mqtt.ini',
-                '/app/config/seplos_bms_mqtt.ini',  # Docker volume mount path
-                'seplos_bms_mqtt.ini',
-                os.path.join(os.path.dirname(__file__), '..', 'seplos_bms_mqtt.ini')
-            ]
-
-            for path in paths_to_try:
-                if os.path.exists(path):
-                    self.config.read(path)
-                    if self.config.sections():
-                        self.config_loaded = True
-                        self.config_path = path
-                        log.debug(f"Config loaded from: {path}")
+            # Common case: a single direct read of the user-set path or configured path
+            first_path = os.getenv('SEPLOS_CONFIG_PATH') or self.config_path
+            if not self._try_load(first_path):
+                # Try remaining paths
+                paths_to_try = [
+                    self.config_path,
+                    '/app/seplos_bms_mqtt.ini',
+                    '/app/config/seplos_bms_mqtt.ini',  # Docker volume mount path
+                    'seplos_bms_mqtt.ini',
+                    os.path.join(os.path.dirname(__file__), '..', 'seplos_bms_mqtt.ini')
+                ]
+
+                for path in paths_to_try:
+                    if path != first_path and os.path.exists(path) and self._try_load(path):
                         break
         except Exception as e:
             log.warning(f"Could not load config file: {e}")
 
+        cls._config = self._sections
+        cls._config_path = self.config_path if self.config_loaded else None
+        cls._loaded = True
+
+    def _try_load(self, path):
+        """Parse path into self._sections; return False if it is missing, unreadable or empty"""
+        try:
+            sections = self._fast_parse(path)
+        except OSError:
+            return False
+        if not sections:
+            return False
+
+        self._sections = sections
+        self.config_loaded = True
+        self.config_path = path
+        get_logger().debug(f"Config loaded from: {path}")
+        return True
+
+    def _fast_parse(self, path):
+        """
+        Parse a simple INI file ([section] + key = value + comments) into
+        {section: {key: value}}. Files using anything else (continuation lines,
+        ':' delimiters, interpolation, [DEFAULT], duplicate sections or keys)
+        are handed to configparser.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        sections = {}
+        current = None
+        for line in lines:
+            stripped = line.strip()
+            if not stripped or stripped[0] in '#;':
+                continue
+
+            match = _SECTION_RE.match(stripped)
+            if match:
+                name = match.group(1)
+                if name == configparser.DEFAULTSECT or name in sections:
+                    return self._configparser_parse(path)
+                current = sections[name] = {}
+                continue
+
+            match = _KV_RE.match(line)
+            if match is None or current is None or line[0].isspace() or '%' in line:
+                return self._configparser_parse(path)
+            # configparser lowercases option names
+            key = match.group(1).lower()
+            if key in current:
+                # Let configparser raise its duplicate option error
+                return self._configparser_parse(path)
+            current[key] = match.group(2)
+
+        return sections
+
+    def _configparser_parse(self, path):
+        """Fallback parser for INI syntax not handled by _fast_parse"""
+        parser = configparser.ConfigParser()
+        parser.read(path, encoding='utf-8')
+        return {section: dict(parser[section]) for section in parser.sections()}
+
     def get(self, section, key, default='mandatory', env_var=None):
         """Get config value from section/key with optional environment variable override"""
         log = get_logger()
@@ -120,38 +217,19 @@ class ConfigLoader:
         if value is not None:
             return value
 
-        # Try new section-based config
-        try:
-            if self.config_loaded and section in self.config:
-                return self.config[section][key]
-        except KeyError:
-            pass
+        if self.config_loaded:
+            # Try new section-based config
+            values = self._sections.get(section)
+            if values is not None and key in values:
+                return values[key]
 
-        # Try legacy flat config for backwards compatibility
-        try:
-            if self.config_loaded and 'seplos3mqtt' in self.config:
+            # Try legacy flat config for backwards compatibility
+            legacy = self._sections.get('seplos3mqtt')
+            if legacy is not None:
                 # Map new names to old names for backwards compatibility
-                legacy_map = {
-                    ('serial', 'port'): 'serial',
-                    ('mqtt', 'server'): 'mqtt_server',
-                    ('mqtt', 'port'): 'mqtt_port',
-                    ('mqtt', 'username'): 'mqtt_user',
-                    ('mqtt', 'password'): 'mqtt_pass',
-                    ('mqtt', 'prefix'): 'mqtt_prefix',
-                    ('influxdb', 'enabled'): 'influxdb_enabled',
-                    ('influxdb', 'url'): 'influxdb_url',
-                    ('influxdb', 'token'): 'influxdb_token',
-                    ('influxdb', 'org'): 'influxdb_org',
-                    ('influxdb', 'bucket'): 'influxdb_bucket',
-                    ('influxdb', 'write_interval'): 'influxdb_write_interval',
-                    ('influxdb', 'publish_mode'): 'influxdb_publish_mode',
-                    ('health', 'check_interval'): 'health_check_interval',
-                    ('general', 'log_level'): 'log_level',
-                }
-                legacy_key = legacy_map.get((section, key), key)
-                return self.config['seplos3mqtt'][legacy_key]
-        except KeyError:
-            pass
+                legacy_key = _LEGACY_MAP.get((section, key), key)
+                if legacy_key in legacy:
+                    return legacy[legacy_key]
 
         if default != 'mandatory':
             return default
@@ -160,17 +238,46 @@ class ConfigLoader:
             print_help()
             sys.exit(1)
 
-
-# Global config instance
-_config_instance = None
+    def snapshot(self):
+        """
+        Resolve all config values once into a {(section, key): value} dict.
+        Same precedence as get(): environment > section-based config > legacy flat config.
+        """
+        snap = {}
+        sections = set(_SECTIONS)
+
+        if self.config_loaded:
+            # Legacy flat config (lowest priority)
+            legacy = self._sections.get('seplos3mqtt')
+            if legacy is not None:
+                # Mapped keys only resolve through their old flat name
+                for new_key, legacy_key in _LEGACY_MAP.items():
+                    if legacy_key in legacy:
+                        snap[new_key] = legacy[legacy_key]
+                # Unmapped keys are looked up by their own name in any section
+                for legacy_key, value in legacy.items():
+                    for section in _SECTIONS:
+                        if (section, legacy_key) not in _LEGACY_MAP:
+                            snap[(section, legacy_key)] = value
+
+            # Section-based config
+            for section, values in self._sections.items():
+                sections.add(section)
+                for key, value in values.items():
+                    snap[(section, key)] = value
+
+        # Environment overrides in upper-case SECTION_KEY format (highest priority)
+        for name, value in os.environ.items():
+            section, sep, key = name.lower().partition('_')
+            if sep and key and section in sections and f"{section}_{key}".upper() == name:
+                snap[(section, key)] = value
+
+        return snap
 
 
 def get_config(section, key, default='mandatory', env_var=None):
     """Helper function to get config values"""
-    global _config_instance
-    if _config_instance is None:
-        _config_instance = ConfigLoader.get_instance()
-    return _config_instance.get(section, key, default, env_var)
+    return ConfigLoader.get_instance().get(section, key, default, env_var)
 
 
 class ConfigValidationError(Exception):
@@ -187,19 +294,22 @@ def validate_config():
     errors = []
     warnings = []
 
+    # Resolve all values once instead of a get_config() lookup per key
+    snap = ConfigLoader.get_instance().snapshot()
+
     # Valid values for enums
     VALID_PUBLISH_MODES = ('changed', 'all')
     VALID_LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
     VALID_BAUDRATES = (9600, 19200, 38400, 57600, 115200)
 
     # Validate serial port
-    serial_port = get_config('serial', 'port', default=None)
+    serial_port = snap.get(('serial', 'port'), None)
     if serial_port:
         if not serial_port.startswith('/dev/') and not serial_port.startswith('COM'):
             warnings.append(f"Serial port '{serial_port}' doesn't look like a valid device path")
 
     # Validate baudrate
-    baudrate = get_config('serial', 'baudrate', default='19200')
+    baudrate = snap.get(('serial', 'baudrate'), '19200')
     try:
         baudrate_int = int(baudrate)
         if baudrate_int not in VALID_BAUDRATES:
@@ -208,7 +318,7 @@ def validate_config():
         errors.append(f"Invalid baudrate value: '{baudrate}' (must be integer)")
 
     # Validate MQTT port
-    mqtt_port = get_config('mqtt', 'port', default='1883')
+    mqtt_port = snap.get(('mqtt', 'port'), '1883')
     try:
         mqtt_port_int = int(mqtt_port)
         if not 1 <= mqtt_port_int <= 65535:
@@ -217,26 +327,26 @@ def validate_config():
         errors.append(f"Invalid MQTT port value: '{mqtt_port}' (must be integer)")
 
     # Validate MQTT publish_mode
-    mqtt_publish_mode = get_config('mqtt', 'publish_mode', default='changed')
+    mqtt_publish_mode = snap.get(('mqtt', 'publish_mode'), 'changed')
     if mqtt_publish_mode.lower() not in VALID_PUBLISH_MODES:
         errors.append(f"Invalid MQTT publish_mode: '{mqtt_publish_mode}'. Valid: {VALID_PUBLISH_MODES}")
 
     # Validate InfluxDB settings if enabled
-    influxdb_enabled = get_config('influxdb', 'enabled', default='false')
+    influxdb_enabled = snap.get(('influxdb', 'enabled'), 'false')
     if influxdb_enabled.lower() == 'true':
-        influxdb_publish_mode = get_config('influxdb', 'publish_mode', default='changed')
+        influxdb_publish_mode = snap.get(('influxdb', 'publish_mode'), 'changed')
         if influxdb_publish_mode.lower() not in VALID_PUBLISH_MODES:
             errors.append(f"Invalid InfluxDB publish_mode: '{influxdb_publish_mode}'. Valid: {VALID_PUBLISH_MODES}")
 
-        influxdb_url = get_config('influxdb', 'url', default='')
+        influxdb_url = snap.get(('influxdb', 'url'), '')
         if not influxdb_url.startswith('http://') and not influxdb_url.startswith('https://'):
             errors.append(f"Invalid InfluxDB URL: '{influxdb_url}' (must start with http:// or https://)")
 
-        influxdb_token = get_config('influxdb', 'token', default='')
+        influxdb_token = snap.get(('influxdb', 'token'), '')
         if not influxdb_token or influxdb_token == 'your-influxdb-token':
             warnings.append("InfluxDB token not configured or using placeholder value")
 
-        write_interval = get_config('influxdb', 'write_interval', default='5')
+        write_interval = snap.get(('influxdb', 'write_interval'), '5')
         try:
             write_interval_int = int(write_interval)
             if write_interval_int < 1:
@@ -245,12 +355,12 @@ def validate_config():
             errors.append(f"Invalid InfluxDB write_interval: '{write_interval}' (must be integer)")
 
     # Validate log_level
-    log_level = get_config('general', 'log_level', default='INFO')
+    log_level = snap.get(('general', 'log_level'), 'INFO')
     if log_level.upper() not in VALID_LOG_LEVELS:
         warnings.append(f"Unknown log_level: '{log_level}'. Valid: {VALID_LOG_LEVELS}")
 
     # Validate health settings
-    check_interval = get_config('health', 'check_interval', default='60')
+    check_interval = snap.get(('health', 'check_interval'), '60')
     try:
         check_interval_int = int(check_interval)
         if check_interval_int < 0:
@@ -258,7 +368,7 @@ def validate_config():
     except ValueError:
         errors.append(f"Invalid health check_interval: '{check_interval}' (must be integer)")
 
-    stale_timeout = get_config('health', 'stale_timeout', default='120')
+    stale_timeout = snap.get(('health', 'stale_timeout'), '120')
     try:
         stale_timeout_int = int(stale_timeout)
         if stale_timeout_int < 0:
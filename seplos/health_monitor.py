@@ -136,15 +136,18 @@ class HealthMonitor:
         self._write_health_file(health_data)
 
     def _write_health_file(self, health_data):
-        """Write health status to file for Docker healthcheck"""
+        """Write health status to file for Docker healthcheck (freshness is the file mtime)"""
         try:
             status = 'healthy' if self.is_healthy() else 'unhealthy'
-            with open(HEALTH_FILE, 'w') as f:
-                f.write(f"{int(time.time())}\n")
-                f.write(f"{status}\n")
-                f.write(f"mqtt:{health_data.get('mqtt_connected', False)}\n")
-                if self.influxdb:
-                    f.write(f"influxdb:{health_data.get('influxdb_connected', False)}\n")
+            content = f"{status}\nmqtt:{health_data.get('mqtt_connected', False)}\n"
+            if self.influxdb:
+                content += f"influxdb:{health_data.get('influxdb_connected', False)}\n"
+
+            # Write to a temp file and rename so the healthcheck never reads a partial file
+            tmp_file = HEALTH_FILE + '.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(content)
+            os.replace(tmp_file, HEALTH_FILE)
         except Exception as e:
             self.log.debug(f"Failed to write health file: {e}")
 
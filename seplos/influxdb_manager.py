@@ -3,14 +3,46 @@ InfluxDB Manager with connection handling, retry logic, and write modes
 """
 
 import time
+import random
 import threading
 from .logging_setup import get_logger
 
+try:
+    from influxdb_client import InfluxDBClient, Point, WriteOptions
+except ImportError:
+    InfluxDBClient = Point = WriteOptions = None
+
 # Retry configuration
 RETRY_MAX_ATTEMPTS = 10
 RETRY_INITIAL_DELAY = 2  # seconds
 RETRY_MAX_DELAY = 60  # seconds
 RETRY_BACKOFF_FACTOR = 2
+RETRY_JITTER = 1  # seconds, random extra delay so restarts don't retry in lockstep
+
+# Numeric fields written per battery
+_BATTERY_NUMERIC_FIELDS = frozenset({
+    'pack_voltage', 'current', 'power', 'remaining_capacity', 'total_capacity',
+    'soc', 'soh', 'cycles', 'average_cell_voltage', 'average_cell_temp',
+    'max_cell_voltage', 'min_cell_voltage', 'max_cell_temp', 'min_cell_temp',
+    'maxdiscurt', 'maxchgcurt', 'cell_delta', 'alarm_count', 'protection_count',
+    'balancing_count', 'ambient_temp', 'mosfet_temp'
+})
+_CELL_KEYS = tuple(f'cell_{i}' for i in range(1, 17))
+_CELL_TEMP_KEYS = tuple(f'cell_temp_{i}' for i in range(1, 5))
+_BATTERY_FIELDS = _BATTERY_NUMERIC_FIELDS.union(_CELL_KEYS, _CELL_TEMP_KEYS)
+
+# Numeric fields written for the pack aggregate
+_PACK_FIELDS = frozenset({
+    'total_voltage', 'total_current', 'total_power',
+    'total_capacity', 'remaining_capacity',
+    'energy_remaining', 'energy_to_full',
+    'average_soc', 'min_soc', 'max_soc', 'soc_spread',
+    'min_soh', 'max_cycles',
+    'min_cell_voltage', 'max_cell_voltage', 'cell_delta', 'avg_cell_voltage',
+    'min_temp', 'max_temp', 'avg_temp',
+    'batteries_online', 'total_alarms', 'total_protections', 'balancing_cells',
+    'max_discharge_current', 'max_charge_current'
+})
 
 
 class InfluxDBManager:
@@ -18,13 +50,22 @@ class InfluxDBManager:
     InfluxDB Manager class - handles InfluxDB connection and writes
 
     Features:
-    - Automatic reconnection with exponential backoff
+    - Non-blocking startup connection and automatic reconnection with exponential backoff
     - Rate limiting per battery
     - Publish-on-change mode support
-    - Batched writes for better performance
+    - Batched writes for better performance (one write call per poll cycle)
     - Connection statistics
     """
 
+    __slots__ = (
+        'url', 'token', 'org', 'bucket', 'enabled', 'client', 'write_api', 'connected',
+        'last_write_time', 'write_interval', 'publish_mode', 'last_values', '_battery_tags', 'log',
+        'reconnect_attempts', 'max_reconnect_attempts', 'reconnect_delay', 'max_reconnect_delay',
+        'last_reconnect_attempt', '_next_reconnect_allowed',
+        'writes_total', 'writes_failed', 'last_successful_write', 'reconnect_count',
+        '_stop_retry', '_retry_thread',
+    )
+
     def __init__(self, url, token, org, bucket, enabled=True, write_interval=5, publish_mode='changed'):
         self.url = url
         self.token = token
@@ -34,11 +75,11 @@ class InfluxDBManager:
         self.client = None
         self.write_api = None
         self.connected = False
-        self.last_write_time = {}
+        self.last_write_time = {}  # time.monotonic() of last write per key
         self.write_interval = write_interval
         self.publish_mode = publish_mode
         self.last_values = {}
-        self.lock = threading.Lock()
+        self._battery_tags = {}  # battery_id -> (key, battery_id tag)
         self.log = get_logger()
 
         # Reconnect settings
@@ -47,7 +88,8 @@ class InfluxDBManager:
         self.reconnect_delay = 5
         self.max_reconnect_delay = 300
 
-        self.last_reconnect_attempt = 0
+        self.last_reconnect_attempt = 0  # time.monotonic()
+        self._next_reconnect_allowed = 0.0  # time.monotonic()
 
         # Stats
         self.writes_total = 0
@@ -55,14 +97,22 @@ class InfluxDBManager:
         self.last_successful_write = 0
         self.reconnect_count = 0
 
+        # Startup connection thread control
+        self._stop_retry = threading.Event()
+        self._retry_thread = None
+
+        if Point is None:
+            if self.enabled:
+                self.log.warning("influxdb-client not installed. InfluxDB disabled.")
+            self.enabled = False
+            return
+
         if self.enabled and self.url and self.token:
             self._setup_client_with_retry()
 
     def _setup_client(self):
         """Setup InfluxDB client"""
         try:
-            from influxdb_client import InfluxDBClient, WriteOptions
-
             self.client = InfluxDBClient(url=self.url, token=self.token, org=self.org)
             # Use batching write API for better performance
             self.write_api = self.client.write_api(write_options=WriteOptions(
@@ -85,32 +135,45 @@ class InfluxDBManager:
             else:
                 self.log.warning(f"InfluxDB health check failed: {health.message}")
                 self.connected = False
-        except ImportError:
-            self.log.warning("influxdb-client not installed. InfluxDB disabled.")
-            self.enabled = False
         except Exception as e:
             self.log.warning(f"InfluxDB connection failed: {e}")
             self.connected = False
 
     def _setup_client_with_retry(self):
-        """Setup InfluxDB client with retry logic at startup"""
+        """Start connecting in the background so startup is not blocked by InfluxDB"""
+        if self._retry_thread is not None and self._retry_thread.is_alive():
+            return  # Thread already running
+
+        self._stop_retry.clear()
+        self._retry_thread = threading.Thread(
+            target=self._retry_loop,
+            name="InfluxDB-Connect",
+            daemon=True
+        )
+        self._retry_thread.start()
+
+    def _retry_loop(self):
+        """Background loop that connects with exponential backoff and jitter"""
         delay = RETRY_INITIAL_DELAY
 
         for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
             self._setup_client()
 
+            if self._stop_retry.is_set():
+                # close() ran while _setup_client() was blocked; it could not close this client
+                self._close_client()
+                return
+
             if self.connected:
                 return  # Successfully connected
 
-            if not self.enabled:
-                return  # influxdb-client not installed
-
             if attempt < RETRY_MAX_ATTEMPTS:
                 self.log.info(
                     f"InfluxDB connection attempt {attempt}/{RETRY_MAX_ATTEMPTS} failed, "
                     f"retrying in {delay}s..."
                 )
-                time.sleep(delay)
+                if self._stop_retry.wait(delay + random.uniform(0, RETRY_JITTER)):
+                    return  # close() called
                 delay = min(delay * RETRY_BACKOFF_FACTOR, RETRY_MAX_DELAY)
 
         self.log.warning(
@@ -119,12 +182,8 @@ class InfluxDBManager:
         )
 
     def _try_reconnect(self):
-        """Attempt to reconnect with exponential backoff"""
-        current_time = time.time()
-
-        # Check if enough time has passed since last attempt
-        if current_time - self.last_reconnect_attempt < self.reconnect_delay:
-            return False
+        """Attempt to reconnect with exponential backoff (is_enabled() enforces the delay)"""
+        current_time = time.monotonic()
 
         if self.reconnect_attempts >= self.max_reconnect_attempts:
             # Reset after max attempts reached and long delay
@@ -132,6 +191,7 @@ class InfluxDBManager:
                 self.reconnect_attempts = 0
                 self.reconnect_delay = 5
             else:
+                self._next_reconnect_allowed = self.last_reconnect_attempt + self.max_reconnect_delay
                 return False
 
         self.last_reconnect_attempt = current_time
@@ -162,111 +222,120 @@ class InfluxDBManager:
 
         # Exponential backoff
         self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+        self._next_reconnect_allowed = current_time + self.reconnect_delay
         return False
 
     def is_enabled(self):
         """Check if InfluxDB is enabled and connected"""
-        if self.enabled and not self.connected:
-            self._try_reconnect()
-        return self.enabled and self.connected
-
-    def _should_write(self, key, data):
-        """Check if data should be written based on publish_mode"""
-        if self.publish_mode == 'all':
+        if self.connected:
             return True
+        if not self.enabled:
+            return False
 
-        # Mode 'changed' - check if values differ
-        with self.lock:
-            if key not in self.last_values:
-                self.last_values[key] = data.copy()
-                return True
-
-            # Compare values
-            changed = False
-            for field, value in data.items():
-                if field not in self.last_values[key] or self.last_values[key][field] != value:
-                    changed = True
-                    break
+        # Not yet time for another reconnect attempt
+        if time.monotonic() < self._next_reconnect_allowed:
+            return False
 
-            if changed:
-                self.last_values[key] = data.copy()
+        # Leave connecting to the startup thread while it is still running
+        if self._retry_thread is not None and self._retry_thread.is_alive():
+            return False
 
-            return changed
+        self._try_reconnect()
+        return self.connected
 
-    def write_battery_data(self, battery_id, data):
-        """Write battery data to InfluxDB with rate limiting and publish_mode support"""
-        if not self.is_enabled():
-            return
+    def _should_write(self, key, data):
+        """Check if data changed since the last write (publish_mode 'changed'; callers skip this in 'all')"""
+        # Check if values differ (data is a fresh dict built by the caller).
+        # No lock needed: each key is owned by one battery and writes come from the serial
+        # reader thread, so a single dict get + set per key cannot race.
+        previous = self.last_values.get(key)
+        if previous is None or previous != data:
+            self.last_values[key] = data
+            return True
+        return False
 
-        current_time = time.time()
-        key = f"battery_{battery_id}"
+    def _build_battery_point(self, battery_id, data, current_time):
+        """Build the Point for one battery, or None if rate limiting / publish_mode skip it"""
+        # Key (also the device tag) and battery_id tag are stable per battery
+        tags = self._battery_tags.get(battery_id)
+        if tags is None:
+            tags = self._battery_tags[battery_id] = (f"battery_{battery_id}", str(battery_id))
+        key, battery_tag = tags
 
         # Rate limit writes per battery
         if key in self.last_write_time:
             if current_time - self.last_write_time[key] < self.write_interval:
-                return
+                return None
 
-        # Check if we should write based on publish_mode
-        write_data = {k: v for k, v in data.items() if isinstance(v, (int, float)) and v is not None}
-        if not self._should_write(key, write_data):
-            return
+        # Numeric fields, cell voltages and cell temperatures to write; built only
+        # after the rate limit passes and reused for change detection
+        fields = {k: float(v) for k, v in data.items() if k in _BATTERY_FIELDS and isinstance(v, (int, float))}
+
+        # Check if we should write based on publish_mode ('all' always writes)
+        if self.publish_mode != 'all' and not self._should_write(key, fields):
+            return None
 
         self.last_write_time[key] = current_time
         self.writes_total += 1
 
+        # Create point for battery measurements
+        point = Point("seplos_battery") \
+            .tag("battery_id", battery_tag) \
+            .tag("device", key)
+
+        for field, value in fields.items():
+            point = point.field(field, value)
+
+        # Add status as tag
+        if 'status' in data:
+            point = point.tag("status", data['status'])
+
+        return point
+
+    def write_batch(self, points, source='batch'):
+        """Write a list of Points in a single write_api call"""
+        if not points:
+            return
+
         try:
-            from influxdb_client import Point
-
-            # Create point for battery measurements
-            point = Point("seplos_battery") \
-                .tag("battery_id", str(battery_id)) \
-                .tag("device", f"battery_{battery_id}")
-
-            # Add all numeric fields
-            numeric_fields = [
-                'pack_voltage', 'current', 'power', 'remaining_capacity', 'total_capacity',
-                'soc', 'soh', 'cycles', 'average_cell_voltage', 'average_cell_temp',
-                'max_cell_voltage', 'min_cell_voltage', 'max_cell_temp', 'min_cell_temp',
-                'maxdiscurt', 'maxchgcurt', 'cell_delta', 'alarm_count', 'protection_count',
-                'balancing_count', 'ambient_temp', 'mosfet_temp'
-            ]
-
-            for field in numeric_fields:
-                if field in data and data[field] is not None:
-                    value = data[field]
-                    if isinstance(value, (int, float)):
-                        point = point.field(field, float(value))
-
-            # Add cell voltages
-            for i in range(1, 17):
-                cell_key = f'cell_{i}'
-                if cell_key in data and data[cell_key] is not None:
-                    point = point.field(cell_key, float(data[cell_key]))
-
-            # Add cell temperatures
-            for i in range(1, 5):
-                temp_key = f'cell_temp_{i}'
-                if temp_key in data and data[temp_key] is not None:
-                    point = point.field(temp_key, float(data[temp_key]))
-
-            # Add status as tag
-            if 'status' in data:
-                point = point.tag("status", data['status'])
-
-            self.write_api.write(bucket=self.bucket, org=self.org, record=point)
-            self.last_successful_write = current_time
+            self.write_api.write(bucket=self.bucket, org=self.org, record=points)
+            # Wall clock, reported in get_stats()
+            self.last_successful_write = time.time()
 
         except Exception as e:
-            self.writes_failed += 1
+            self.writes_failed += len(points)
             self.connected = False
-            self.log.error(f"InfluxDB write error for battery {battery_id}: {e}")
+            self.log.error(f"InfluxDB write error for {source}: {e}")
+
+    def write_battery_data(self, battery_id, data):
+        """Write battery data to InfluxDB with rate limiting and publish_mode support"""
+        if not self.is_enabled():
+            return
+
+        point = self._build_battery_point(battery_id, data, time.monotonic())
+        if point is not None:
+            self.write_batch([point], f"battery {battery_id}")
+
+    def write_all_batteries(self, batteries_data):
+        """Write data for all batteries ({battery_id: data}) in a single batched write"""
+        if not self.is_enabled():
+            return
+
+        current_time = time.monotonic()
+        points = []
+        for battery_id, data in batteries_data.items():
+            point = self._build_battery_point(battery_id, data, current_time)
+            if point is not None:
+                points.append(point)
+
+        self.write_batch(points, f"{len(points)} batteries")
 
     def write_pack_data(self, data):
         """Write pack aggregate data to InfluxDB with publish_mode support"""
         if not self.is_enabled():
             return
 
-        current_time = time.time()
+        current_time = time.monotonic()
         key = "pack"
 
         # Rate limit writes
@@ -274,50 +343,27 @@ class InfluxDBManager:
             if current_time - self.last_write_time[key] < self.write_interval:
                 return
 
-        # Check if we should write based on publish_mode
-        write_data = {k: v for k, v in data.items() if isinstance(v, (int, float)) and v is not None}
-        if not self._should_write(key, write_data):
+        # Pack fields to write; built only after the rate limit passes and reused for change detection
+        fields = {k: float(v) for k, v in data.items() if k in _PACK_FIELDS and isinstance(v, (int, float))}
+
+        # Check if we should write based on publish_mode ('all' always writes)
+        if self.publish_mode != 'all' and not self._should_write(key, fields):
             return
 
         self.last_write_time[key] = current_time
         self.writes_total += 1
 
-        try:
-            from influxdb_client import Point
-
-            point = Point("seplos_pack") \
-                .tag("device", "pack_aggregate")
-
-            # Add all pack fields
-            pack_fields = [
-                'total_voltage', 'total_current', 'total_power',
-                'total_capacity', 'remaining_capacity',
-                'energy_remaining', 'energy_to_full',
-                'average_soc', 'min_soc', 'max_soc', 'soc_spread',
-                'min_soh', 'max_cycles',
-                'min_cell_voltage', 'max_cell_voltage', 'cell_delta', 'avg_cell_voltage',
-                'min_temp', 'max_temp', 'avg_temp',
-                'batteries_online', 'total_alarms', 'total_protections', 'balancing_cells',
-                'max_discharge_current', 'max_charge_current'
-            ]
-
-            for field in pack_fields:
-                if field in data and data[field] is not None:
-                    value = data[field]
-                    if isinstance(value, (int, float)):
-                        point = point.field(field, float(value))
-
-            # Add status as tag
-            if 'status' in data:
-                point = point.tag("status", data['status'])
-
-            self.write_api.write(bucket=self.bucket, org=self.org, record=point)
-            self.last_successful_write = current_time
+        point = Point("seplos_pack") \
+            .tag("device", "pack_aggregate")
 
-        except Exception as e:
-            self.writes_failed += 1
-            self.connected = False
-            self.log.error(f"InfluxDB write error for pack: {e}")
+        for field, value in fields.items():
+            point = point.field(field, value)
+
+        # Add status as tag
+        if 'status' in data:
+            point = point.tag("status", data['status'])
+
+        self.write_batch([point], "pack")
 
     def get_stats(self):
         """Return stats for health reporting"""
@@ -333,6 +379,15 @@ class InfluxDBManager:
 
     def close(self):
         """Close InfluxDB connection"""
+        # Stop startup connection thread
+        self._stop_retry.set()
+        if self._retry_thread is not None and self._retry_thread.is_alive():
+            self._retry_thread.join(timeout=2)
+
+        self._close_client()
+
+    def _close_client(self):
+        """Close write_api and client"""
         if self.write_api:
             try:
                 self.write_api.close()
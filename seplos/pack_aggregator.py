@@ -301,9 +301,8 @@ class PackAggregator:
 
         # Write to InfluxDB if enabled
         if self.influxdb and self.influxdb.is_enabled():
-            # Write individual battery data
-            for batt_id, batt_data in online_batts.items():
-                self.influxdb.write_battery_data(batt_id, batt_data)
+            # Write individual battery data in one batch
+            self.influxdb.write_all_batteries(online_batts)
 
             # Write pack aggregate data
             pack_data = {
@@ -108,10 +108,11 @@ def main():
                 write_interval=influxdb_write_interval,
                 publish_mode=influxdb_publish_mode
             )
-            if influxdb_manager.is_enabled():
+            if influxdb_manager.enabled:
+                # Connection is established in the background
                 log.info(f"InfluxDB Manager initialized (mode: {influxdb_publish_mode}, interval: {influxdb_write_interval}s)")
             else:
-                log.warning("InfluxDB configured but failed to connect")
+                log.warning("InfluxDB configured but influxdb-client is not installed")
         else:
             log.info("InfluxDB disabled (not configured)")
 